@@ -2,6 +2,7 @@ from unittest.mock import MagicMock, patch
 
 from zerver.lib.test_classes import WebhookTestCase
 from zerver.lib.webhooks.git import COMMITS_LIMIT
+from zerver.webhooks.onedev.view import patchURL
 
 
 class OnedevHookTests(WebhookTestCase):
@@ -103,6 +104,28 @@ class OnedevHookTests(WebhookTestCase):
         expected_message = """testuser changed issue #3 New test issue:\n\n~~~ quote\ntestuser changed 'state' from 'Open' to 'Closed'\n~~~"""
         self.check_webhook("issue__changed", expected_topic, expected_message)
 
+    def test_issues_changed_unsupported_change(self) -> None:
+        payload = self.get_body("issue__changed__renamed")
+        result = self.client_post(self.url, payload, content_type="application/json")
+        self.assert_json_error(
+            result,
+            "The 'issue_changed/IssueTitleChangeData' event isn't currently supported by the Onedev webhook",
+        )
+
+    def test_patch_url_multiple_links(self) -> None:
+        self.assertEqual(
+            patchURL("[issue #3](None) and [PR #28](None), [kept](https://example.com)"),
+            "issue #3 and PR #28, [kept](https://example.com)",
+        )
+
+    def test_unsupported_event(self) -> None:
+        payload = self.get_body("issue__commented")
+        result = self.client_post(self.url, payload, content_type="application/json")
+        self.assert_json_error(
+            result,
+            "The 'io.onedev.server.event.issue.IssueCommented' event isn't currently supported by the Onedev webhook",
+        )
+
     # def test_issues_reopened(self) -> None:
     #     expected_topic = "test / issue #3 New test issue"
     #     expected_message = """kostekIV reopened [issue #3](https://try.gogs.io/kostekIV/test/issues/3):\n\n~~~ quote\nTest\n~~~"""
@@ -1,4 +1,5 @@
-from typing import Dict, List, Optional, Protocol
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Protocol, Tuple
 
 from django.http import HttpRequest, HttpResponse
 
@@ -33,9 +34,20 @@ from zerver.lib.webhooks.git import (
 )
 from zerver.models import UserProfile
 
+_EVENT_CLASS_PREFIX = "io.onedev.server.event."
+_EVENT_MAP = {
+    "issue.IssueOpened": "issue_opened",
+    "issue.IssueChanged": "issue_changed",
+    "pullrequest.PullRequestOpened": "pull_request_opened",
+    "pullrequest.PullRequestChanged": "pull_request_changed",
+}
+
 # ALL_EVENT_TYPES = ["issue_comment", "issues", "create", "pull_request", "push", "release"]
-ALL_EVENT_TYPES = ["issue_opened", "issue_changed", "pull_request_opened", "pull_request_changed"]
+ALL_EVENT_TYPES = list(_EVENT_MAP.values())
+
+_CHECK_NONE_OR_STRING = check_none_or(check_string)
 
+_PATCH_URL_RE = re2.compile(r"\[([^\]]+)\]\(None\)")
 
 
 @webhook_view("Onedev", all_event_types=ALL_EVENT_TYPES)
@@ -58,83 +70,100 @@ def api_onedev_webhook(
     )
 
 
-def get_event(payload: WildValue):
-    rawEvent = payload["@class"].tame(check_string)
-    if rawEvent == "io.onedev.server.event.issue.IssueOpened":
-        return "issue_opened"
-    elif rawEvent == "io.onedev.server.event.issue.IssueChanged":
-        return "issue_changed"
-    elif rawEvent == "io.onedev.server.event.pullrequest.PullRequestOpened":
-        return "pull_request_opened"
-    elif rawEvent == "io.onedev.server.event.pullrequest.PullRequestChanged":
-        return "pull_request_changed"
+def get_event(payload: WildValue) -> Optional[str]:
+    raw_event = payload["@class"].tame(check_string)
+    if not raw_event.startswith(_EVENT_CLASS_PREFIX):
+        return None
+    return _EVENT_MAP.get(raw_event[len(_EVENT_CLASS_PREFIX) :])
+
+
+@dataclass
+class _OnedevEvent:
+    event: str
+    project: str
+    user: str
+    number: int
+    title: str
+    payload: WildValue
+
+
+def _parse(payload: WildValue, event: str) -> _OnedevEvent:
+    entity = payload["issue"] if event.startswith("issue_") else payload["request"]
+    return _OnedevEvent(
+        event=event,
+        project=payload["project"]["name"].tame(check_string),
+        user=payload["user"]["name"].tame(check_string),
+        number=entity["number"].tame(check_int),
+        title=entity["title"].tame(check_string),
+        payload=payload,
+    )
 
 
 def patchURL(text: str):
     '''currently onedev has no url, this replaces URls with target None with simply the URL title'''
-    return re2.sub(
-        "\[(.+)\]\(None\)",
-        lambda match_obj: match_obj.group(1) if match_obj.group(1) is not None else match_obj(0),
-        text,
-    )
+    if "](None)" not in text:
+        return text
+    return _PATCH_URL_RE.sub(lambda match_obj: match_obj.group(1), text)
 
 
-def format_issue_topic(payload: WildValue) -> str:
-    project_name = payload["project"]["name"].tame(check_string)
-    number = payload["issue"]["number"].tame(check_int)
-    title = payload["issue"]["title"].tame(check_string)
-    return f"{project_name} / issue #{number} {title}"
+def format_issue_topic(evt: _OnedevEvent) -> str:
+    return f"{evt.project} / issue #{evt.number} {evt.title}"
 
 
-def format_issue_event(payload: WildValue, event_type: str) -> str:
-    user_name = payload["user"]["name"].tame(check_string)
-    number = payload["issue"]["number"].tame(check_int)
-    title = payload["issue"]["title"].tame(check_string)
+def format_issue_event(evt: _OnedevEvent, event_type: str) -> str:
+    message: Optional[str] = None
     if event_type == "opened":
-        message = payload["issue"]["description"].tame(check_none_or(check_string))  # TODO tame?
+        message = evt.payload["issue"]["description"].tame(_CHECK_NONE_OR_STRING)  # TODO tame?
     else:
-        change_type = payload["change"]["data"]["@type"].tame(check_string)
+        change_data = evt.payload["change"]["data"]
+        change_type = change_data["@type"].tame(check_string)
         if change_type == "IssueStateChangeData":
-            old_state = payload["change"]["data"]["oldState"].tame(check_string)
-            new_state = payload["change"]["data"]["newState"].tame(check_string)
-            message = f"{user_name} changed 'state' from '{old_state}' to '{new_state}'"
+            old_state = change_data["oldState"].tame(check_string)
+            new_state = change_data["newState"].tame(check_string)
+            message = f"{evt.user} changed 'state' from '{old_state}' to '{new_state}'"
+        if message is None:
+            raise UnsupportedWebhookEventType(f"issue_changed/{change_type}")
     return patchURL(
         get_issue_event_message(
             url=None,
-            user_name=user_name,
-            number=number,
+            user_name=evt.user,
+            number=evt.number,
             action=event_type,
-            title=title,
+            title=evt.title,
             message=message,
         )
     )
 
-def format_pull_request_topic(payload: WildValue) -> str:
-    project_name = payload["project"]["name"].tame(check_string)
-    number = payload["request"]["number"].tame(check_int)
-    title = payload["request"]["title"].tame(check_string)
-    return f"{project_name} / PR #{number} {title}"
+def format_pull_request_topic(evt: _OnedevEvent) -> str:
+    return f"{evt.project} / PR #{evt.number} {evt.title}"
 
         # expected_message = """john opened [PR #1](http://localhost:3000/john/try-git/pulls/1) from `feature` to `master`."""
-def format_pull_request_event(payload: WildValue, include_title: bool = False) -> str:
-    user_name = payload["user"]["name"].tame(check_string)
-    action = payload["request"]["lastUpdate"]["activity"].tame(check_string)
+def format_pull_request_event(evt: _OnedevEvent) -> str:
+    pull_request = evt.payload["request"]
+    action = pull_request["lastUpdate"]["activity"].tame(check_string)
     url = None
-    number = payload["request"]["number"].tame(check_int)
-    target_branch = payload["request"]["sourceBranch"].tame(check_string) # sourceBranch/targetBranch seems to be reversed vs target/base_branch
-    base_branch = payload["request"]["targetBranch"].tame(check_string)
-    title = payload["pull_request"]["title"].tame(check_string) if include_title else None
+    target_branch = pull_request["sourceBranch"].tame(check_string) # sourceBranch/targetBranch seems to be reversed vs target/base_branch
+    base_branch = pull_request["targetBranch"].tame(check_string)
 
     return patchURL(get_pull_request_event_message(
-        user_name=user_name,
+        user_name=evt.user,
         action=action,
         url=url,
-        number=number,
+        number=evt.number,
         target_branch=target_branch,
         base_branch=base_branch,
-        title=title,
     ))
 
+
+# event -> (body formatter, topic formatter)
+_HANDLERS: Dict[str, Tuple[Callable[[_OnedevEvent], str], Callable[[_OnedevEvent], str]]] = {
+    "issue_opened": (lambda evt: format_issue_event(evt, "opened"), format_issue_topic),
+    "issue_changed": (lambda evt: format_issue_event(evt, "changed"), format_issue_topic),
+    "pull_request_opened": (format_pull_request_event, format_pull_request_topic),
+    "pull_request_changed": (format_pull_request_event, format_pull_request_topic),
+}
+
+
 def onedev_webhook_main(
     integration_name: str,
     http_header_name: str,
@@ -144,34 +173,14 @@ def onedev_webhook_main(
     branches: Optional[str],
     user_specified_topic: Optional[str],
 ) -> HttpResponse:
-    repo = payload["project"]["name"].tame(check_string)
     event = get_event(payload)
-    if event == "issue_opened":
-        event_type = event.split("_")[1]
-        body = format_issue_event(payload, event_type)
-        if user_specified_topic:
-            topic = user_specified_topic
-        else:
-            topic = format_issue_topic(payload)
-    elif event == "issue_changed":
-        event_type = event.split("_")[1]
-        body = format_issue_event(payload, event_type)
-        if user_specified_topic:
-            topic = user_specified_topic
-        else:
-            topic = format_issue_topic(payload)
-    elif event == "pull_request_opened":
-        body = format_pull_request_event(payload)
-        if user_specified_topic:
-            topic = user_specified_topic
-        else:
-            topic = format_pull_request_topic(payload)
-    elif event == "pull_request_changed":
-        body = format_pull_request_event(payload)
-        if user_specified_topic:
-            topic = user_specified_topic
-        else:
-            topic = format_pull_request_topic(payload)
+    if event is None or event not in _HANDLERS:
+        raise UnsupportedWebhookEventType(payload["@class"].tame(check_string))
+
+    body_fn, topic_fn = _HANDLERS[event]
+    evt = _parse(payload, event)
+    body = body_fn(evt)
+    topic = user_specified_topic or topic_fn(evt)
 
     # elif event == "create":
     #     body = format_new_branch_event(payload)
@@ -223,8 +232,5 @@ def onedev_webhook_main(
     #         title=payload["release"]["name"].tame(check_string),
     #     )
 
-    else:
-        raise UnsupportedWebhookEventType(event)
-
     check_send_webhook_message(request, user_profile, topic, body, event)
     return json_success(request)